@@ -5,6 +5,7 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_cors import CORS
+from jinja2 import FileSystemBytecodeCache
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
 from dotenv import load_dotenv
@@ -21,12 +22,19 @@ app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET")
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
+# Persist compiled templates across worker restarts. Template auto-reload is
+# already off unless the app runs in debug mode.
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(os.environ.get("JINJA_CACHE_DIR"))
+
 # Database configuration
 app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
     'pool_pre_ping': True,
     "pool_recycle": 300,
+    # Keep enough warm connections for concurrent requests per process
+    "pool_size": int(os.environ.get("DB_POOL_SIZE", 20)),
+    "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", 10)),
 }
 
 # Initialize extensions
@@ -50,7 +58,15 @@ def load_user(user_id):
 with app.app_context():
     import models  # noqa: F401
     db.create_all()
+    models.upgrade_event_table()
     logging.info("Database tables created")
 
+# Encode JSON responses with orjson when it is installed
+from utils import OrjsonProvider, orjson  # noqa: E402
+if orjson is not None:
+    app.json = OrjsonProvider(app)
+    # jinja_env already exists by now and kept the old provider for |tojson
+    app.jinja_env.policies['json.dumps_function'] = app.json.dumps
+
 # Import routes after app and models are set up
 from routes import *
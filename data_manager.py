@@ -1,9 +1,16 @@
+"""JSON file storage for events
+
+Not used by the app, which stores events through SQLAlchemy. This predates
+the database models and expects a JSON-storage Event (string ids,
+update(), tag lists) that models.py no longer defines, so it is kept as-is
+rather than optimized.
+"""
 import json
 import os
 import logging
 from typing import Dict, List, Optional
 from models import Event
-from utils import search_events, filter_events, sort_events
+from utils import parse_date_for_sorting
 
 class DataManager:
     """Manages event data persistence using JSON file storage"""
@@ -150,18 +157,36 @@ class DataManager:
         try:
             events_list = list(self.events.values())
             
-            # Apply search filter
+            # Apply search filter (name, location, description and tags)
             if search:
-                events_list = search_events(events_list, search)
+                search = search.lower().strip()
+                events_list = [
+                    event for event in events_list
+                    if search in ' '.join([event.name, event.location, event.description, *event.tags]).lower()
+                ]
             
             # Apply tag filter
             if tag_filter:
-                events_list = filter_events(events_list, tag_filter)
+                tag_filter = tag_filter.lower().strip()
+                events_list = [
+                    event for event in events_list
+                    if tag_filter in {tag.lower() for tag in event.tags}
+                ]
             
             # Apply sorting
-            events_list = sort_events(events_list, sort_by, sort_order)
-            
-            return events_list
+            sort_keys = {
+                'name': lambda event: event.name.lower(),
+                'location': lambda event: event.location.lower(),
+                'created_at': lambda event: event.created_at,
+                'updated_at': lambda event: event.updated_at,
+            }
+            sort_key = sort_keys.get(sort_by, lambda event: parse_date_for_sorting(event.date))
+            reverse = sort_order.lower() == 'desc'
+            try:
+                return sorted(events_list, key=sort_key, reverse=reverse)
+            except Exception:
+                # Fallback to name sorting if there's an error
+                return sorted(events_list, key=sort_keys['name'], reverse=reverse)
             
         except Exception as e:
             self.logger.error(f"Error getting events: {e}")
@@ -1,5 +1,8 @@
+import logging
 from datetime import datetime
 from flask_login import UserMixin
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import DBAPIError
 from werkzeug.security import generate_password_hash, check_password_hash
 from app import db
 
@@ -28,8 +31,40 @@ class User(UserMixin, db.Model):
         return f'<User {self.username}>'
 
 
+# Lower-cased text the event search matches against, kept up to date by the database
+SEARCHABLE_TEXT_SQL = (
+    "lower(coalesce(name, '') || ' ' || coalesce(location, '') || ' ' || "
+    "coalesce(description, '') || ' ' || coalesce(tags, ''))"
+)
+
+# Lower-cased tags wrapped in commas, so a whole tag matches as '%,tag,%'
+# (relies on tags being stored through Event.join_tags)
+TAG_LIST_SQL = "',' || lower(coalesce(tags, '')) || ','"
+
+# Generated columns and the SQL the database computes them from
+GENERATED_COLUMNS = {
+    'searchable_text': SEARCHABLE_TEXT_SQL,
+    'tag_list': TAG_LIST_SQL,
+}
+
+
+# Field -> (required, max length, length error) for Event.validate; the same
+# shape as utils.EVENT_FIELD_RULES, with the model's own column limits
+EVENT_COLUMN_RULES = {
+    'name': (True, 200, "Event name must be less than 200 characters"),
+    'date': (True, None, None),
+    'location': (True, 200, "Location must be less than 200 characters"),
+    'description': (False, 1000, "Description must be less than 1000 characters"),
+}
+
+
 class Event(db.Model):
     __tablename__ = 'events'
+    __table_args__ = (
+        # Back the per-user listings, which sort by date or name
+        db.Index('ix_events_user_date', 'user_id', 'date'),
+        db.Index('ix_events_user_name', 'user_id', 'name'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
@@ -37,23 +72,45 @@ class Event(db.Model):
     location = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=True)
     tags = db.Column(db.Text, nullable=True)  # Store as comma-separated string
+    # Stored, not virtual, so Postgres can build trigram indexes on them
+    searchable_text = db.Column(db.Text, db.Computed(SEARCHABLE_TEXT_SQL, persisted=True))
+    tag_list = db.Column(db.Text, db.Computed(TAG_LIST_SQL, persisted=True))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Foreign key to User
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     
+    def __init__(self, **kwargs):
+        # Stamp both timestamps from one clock read instead of one per column default
+        now = datetime.utcnow()
+        kwargs.setdefault('created_at', now)
+        kwargs.setdefault('updated_at', now)
+        super().__init__(**kwargs)
+    
     def to_dict(self):
+        return Event.row_to_dict(self)
+    
+    @staticmethod
+    def join_tags(tags):
+        """Normalize a tag list or comma-separated string for storage"""
+        if isinstance(tags, str):
+            tags = tags.split(',')
+        return ','.join(tag for tag in (tag.strip() for tag in tags or ()) if tag)
+    
+    @staticmethod
+    def row_to_dict(row):
+        """Build the event dict from an Event or a row of its columns"""
         return {
-            'id': self.id,
-            'name': self.name,
-            'date': self.date,
-            'location': self.location,
-            'description': self.description,
-            'tags': self.tags.split(',') if self.tags else [],
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'user_id': self.user_id
+            'id': row.id,
+            'name': row.name,
+            'date': row.date,
+            'location': row.location,
+            'description': row.description,
+            'tags': row.tags.split(',') if row.tags else [],
+            'created_at': row.created_at.isoformat() if row.created_at else None,
+            'updated_at': row.updated_at.isoformat() if row.updated_at else None,
+            'user_id': row.user_id
         }
     
     @classmethod
@@ -64,7 +121,7 @@ class Event(db.Model):
             date=data['date'],
             location=data['location'],
             description=data['description'],
-            tags=','.join(data.get('tags', [])),
+            tags=Event.join_tags(data.get('tags')),
             user_id=user_id
         )
         return event
@@ -75,37 +132,104 @@ class Event(db.Model):
         self.date = data.get('date', self.date)
         self.location = data.get('location', self.location)
         self.description = data.get('description', self.description)
-        self.tags = ','.join(data.get('tags', [])) if data.get('tags') else self.tags
+        self.tags = Event.join_tags(data['tags']) if data.get('tags') else self.tags
         self.updated_at = datetime.utcnow()
     
     def validate(self):
         """Validate event data and return list of errors"""
         errors = []
+        length_errors = []
         
-        if not self.name or not self.name.strip():
-            errors.append("Event name is required")
-        
-        if not self.date or not self.date.strip():
-            errors.append("Event date is required")
-        else:
-            try:
-                datetime.fromisoformat(self.date.replace('Z', '+00:00'))
-            except ValueError:
-                errors.append("Invalid date format")
-        
-        if not self.location or not self.location.strip():
-            errors.append("Event location is required")
-        
-        if len(self.name) > 200:
-            errors.append("Event name must be less than 200 characters")
-        
-        if len(self.location) > 200:
-            errors.append("Location must be less than 200 characters")
-        
-        if self.description and len(self.description) > 1000:
-            errors.append("Description must be less than 1000 characters")
+        # One attribute read per field covers both the required and length checks
+        for field, (required, max_length, length_error) in EVENT_COLUMN_RULES.items():
+            value = getattr(self, field) or ''
+            if required and not value.strip():
+                errors.append(f"Event {field} is required")
+            elif field == 'date':
+                try:
+                    datetime.fromisoformat(value.replace('Z', '+00:00'))
+                except ValueError:
+                    errors.append("Invalid date format")
+            if max_length is not None and len(value) > max_length:
+                length_errors.append(length_error)
         
-        return errors
+        return errors + length_errors
     
     def __repr__(self):
-        return f'<Event {self.name}>'
\ No newline at end of file
+        return f'<Event {self.name}>'
+
+
+# Columns matched with leading-wildcard LIKE by the search and tag filters
+TRIGRAM_COLUMNS = ('searchable_text', 'tag_list')
+
+
+def _event_column_names():
+    return {column['name'] for column in inspect(db.engine).get_columns('events')}
+
+
+def normalize_stored_tags():
+    """Rewrite stored tags into the form Event.join_tags produces"""
+    with db.engine.begin() as conn:
+        rows = conn.execute(text('SELECT id, tags FROM events WHERE tags IS NOT NULL')).all()
+        updates = [
+            {'id': event_id, 'tags': Event.join_tags(tags)}
+            for event_id, tags in rows
+            if Event.join_tags(tags) != tags
+        ]
+        if updates:
+            conn.execute(text('UPDATE events SET tags = :tags WHERE id = :id'), updates)
+
+
+def upgrade_event_table():
+    """Bring an existing events table up to date with the model
+    
+    Adds the generated search and tag columns and the indexes that
+    db.create_all() only creates for new tables, plus trigram indexes on
+    Postgres.
+    """
+    columns = _event_column_names()
+    if 'tag_list' not in columns:
+        # Tables from before tag_list may hold raw form strings like 'a ,b'
+        normalize_stored_tags()
+    
+    # Every gunicorn worker runs this at import, so another worker may add a
+    # column or index between our check and our DDL; that is not an error.
+    postgres = db.engine.dialect.name == 'postgresql'
+    # Stored on Postgres to match the model and keep the columns indexable;
+    # SQLite's ALTER TABLE can only add virtual generated columns
+    stored = ' STORED' if postgres else ''
+    if_not_exists = ' IF NOT EXISTS' if postgres else ''
+    for name, sql in GENERATED_COLUMNS.items():
+        if name in columns:
+            continue
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(text(
+                    f'ALTER TABLE events ADD COLUMN{if_not_exists} {name} TEXT '
+                    f'GENERATED ALWAYS AS ({sql}){stored}'
+                ))
+        except DBAPIError:
+            if name not in _event_column_names():
+                raise
+    
+    for index in Event.__table__.indexes:
+        try:
+            index.create(db.engine, checkfirst=True)
+        except DBAPIError:
+            if index.name not in {ix['name'] for ix in inspect(db.engine).get_indexes('events')}:
+                raise
+    
+    if not postgres:
+        return
+    
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+            for column in TRIGRAM_COLUMNS:
+                conn.execute(text(
+                    f'CREATE INDEX IF NOT EXISTS ix_events_{column}_trgm '
+                    f'ON events USING gin ({column} gin_trgm_ops)'
+                ))
+    except Exception as e:
+        # Searches still work without them, just with sequential scans
+        logging.warning(f"Could not create trigram indexes: {e}")
@@ -1,14 +1,59 @@
-from flask import render_template, request, jsonify, redirect, url_for, flash
+from flask import Response, render_template, request, jsonify, redirect, url_for, flash, session
 from flask_login import login_user, logout_user, login_required, current_user
-from urllib.parse import urlparse
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 import logging
 
 from app import app, db
 from models import User, Event
+from utils import dumps_json, format_date_display, list_user_events
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Memoized date formatting for templates: {{ event.date|event_date }}
+app.add_template_filter(format_date_display, 'event_date')
+
+# Serialized once; returned for every API lookup miss
+_NOT_FOUND_BODY = dumps_json({'success': False, 'error': 'Event not found'})
+
+
+def _not_found_response():
+    return Response(_NOT_FOUND_BODY, status=404, mimetype='application/json')
+
+
+# Rendered HTML of pages that only vary with the login state
+_page_cache = {}
+
+
+def _render_page(template):
+    """Render a static page once per login state and reuse the HTML"""
+    # Debug mode reloads templates, and pending flash messages are per-user
+    if app.debug or '_flashes' in session:
+        return render_template(template)
+    key = (template, current_user.is_authenticated)
+    html = _page_cache.get(key)
+    if html is None:
+        html = _page_cache[key] = render_template(template)
+    return html
+
+
+def _is_safe_redirect(target):
+    """True only for same-site paths, such as '/events/create'"""
+    # Browsers drop tabs and newlines from URLs, turning '/\t/host' into '//host'
+    if not target or any(ch < ' ' or ch == '\x7f' for ch in target):
+        return False
+    # '//host' and '/\host' are both read as another host by browsers
+    return target.startswith('/') and not target.startswith(('//', '/\\'))
+
+
+def _get_user_event(event_id):
+    """Fetch an event by primary key, or None if it is not the current user's"""
+    event = db.session.get(Event, event_id)
+    if event is None or event.user_id != current_user.id:
+        return None
+    return event
+
 
 @app.route('/')
 def index():
@@ -45,21 +90,12 @@ def register():
         if password != confirm_password:
             errors.append('Passwords do not match')
         
-        # Check if user already exists
-        existing_user = User.query.filter_by(username=username).first()
-        if existing_user:
-            errors.append('Username already exists')
-        
-        existing_email = User.query.filter_by(email=email).first()
-        if existing_email:
-            errors.append('Email already registered')
-        
         if errors:
             for error in errors:
                 flash(error, 'danger')
             return render_template('register.html')
         
-        # Create new user
+        # Create new user; the unique constraints catch existing usernames/emails
         try:
             user = User(username=username, email=email)
             user.set_password(password)
@@ -69,6 +105,32 @@ def register():
             flash('Registration successful! Please log in.', 'success')
             return redirect(url_for('login'))
         
+        except IntegrityError:
+            db.session.rollback()
+            
+            # Only look up which field clashed once the insert has failed
+            existing = db.session.execute(
+                select(User.username, User.email).where(
+                    (User.username == username) | (User.email == email)
+                )
+            ).all()
+            
+            username_taken = any(row.username == username for row in existing)
+            email_taken = any(row.email == email for row in existing)
+            
+            if username_taken:
+                flash('Username already exists', 'danger')
+            
+            if email_taken:
+                flash('Email already registered', 'danger')
+            
+            if not (username_taken or email_taken):
+                # Some other constraint failed, or the clashing row is already gone
+                logger.error(f"Registration integrity error for {username!r}")
+                flash('An error occurred during registration. Please try again.', 'danger')
+            
+            return render_template('register.html')
+        
         except Exception as e:
             logger.error(f"Registration error: {e}")
             flash('An error occurred during registration. Please try again.', 'danger')
@@ -100,7 +162,7 @@ def login():
             
             # Redirect to next page or dashboard
             next_page = request.args.get('next')
-            if not next_page or urlparse(next_page).netloc != '':
+            if not _is_safe_redirect(next_page):
                 next_page = url_for('dashboard')
             return redirect(next_page)
         else:
@@ -128,42 +190,7 @@ def dashboard():
     sort_order = request.args.get('order', 'asc')
     tag_filter = request.args.get('tag', '').strip()
     
-    # Query user's events
-    query = Event.query.filter_by(user_id=current_user.id)
-    
-    # Apply search filter
-    if search:
-        query = query.filter(
-            Event.name.ilike(f'%{search}%') |
-            Event.location.ilike(f'%{search}%') |
-            Event.description.ilike(f'%{search}%')
-        )
-    
-    # Apply tag filter
-    if tag_filter:
-        query = query.filter(Event.tags.ilike(f'%{tag_filter}%'))
-    
-    # Apply sorting
-    if sort_by == 'name':
-        if sort_order == 'desc':
-            query = query.order_by(Event.name.desc())
-        else:
-            query = query.order_by(Event.name.asc())
-    elif sort_by == 'location':
-        if sort_order == 'desc':
-            query = query.order_by(Event.location.desc())
-        else:
-            query = query.order_by(Event.location.asc())
-    else:  # date
-        if sort_order == 'desc':
-            query = query.order_by(Event.date.desc())
-        else:
-            query = query.order_by(Event.date.asc())
-    
-    events = query.all()
-    
-    # Convert to dict format for template
-    events_data = [event.to_dict() for event in events]
+    events_data = list_user_events(current_user.id, search, tag_filter, sort_by, sort_order)
     
     return render_template('dashboard.html', 
                          events=events_data,
@@ -188,7 +215,7 @@ def create_event():
                 date=data['date'],
                 location=data['location'],
                 description=data.get('description', ''),
-                tags=','.join(data.get('tags', [])) if isinstance(data.get('tags'), list) else data.get('tags', ''),
+                tags=Event.join_tags(data.get('tags')),
                 user_id=current_user.id
             )
             
@@ -231,7 +258,7 @@ def create_event():
 @login_required
 def edit_event(event_id):
     """Edit an existing event"""
-    event = Event.query.filter_by(id=event_id, user_id=current_user.id).first()
+    event = _get_user_event(event_id)
     
     if not event:
         flash('Event not found or you do not have permission to edit it.', 'danger')
@@ -282,11 +309,11 @@ def edit_event(event_id):
 @login_required
 def delete_event(event_id):
     """Delete an event"""
-    event = Event.query.filter_by(id=event_id, user_id=current_user.id).first()
+    event = _get_user_event(event_id)
     
     if not event:
         if request.is_json:
-            return jsonify({'success': False, 'error': 'Event not found'}), 404
+            return _not_found_response()
         else:
             flash('Event not found or you do not have permission to delete it.', 'danger')
             return redirect(url_for('dashboard'))
@@ -327,30 +354,8 @@ def api_get_events():
         sort_order = request.args.get('order', 'asc')
         tag_filter = request.args.get('tag', '').strip()
         
-        # Query user's events
-        query = Event.query.filter_by(user_id=current_user.id)
-        
-        # Apply filters (same logic as dashboard)
-        if search:
-            query = query.filter(
-                Event.name.ilike(f'%{search}%') |
-                Event.location.ilike(f'%{search}%') |
-                Event.description.ilike(f'%{search}%')
-            )
-        
-        if tag_filter:
-            query = query.filter(Event.tags.ilike(f'%{tag_filter}%'))
-        
-        # Apply sorting
-        if sort_by == 'name':
-            query = query.order_by(Event.name.desc() if sort_order == 'desc' else Event.name.asc())
-        elif sort_by == 'location':
-            query = query.order_by(Event.location.desc() if sort_order == 'desc' else Event.location.asc())
-        else:  # date
-            query = query.order_by(Event.date.desc() if sort_order == 'desc' else Event.date.asc())
-        
-        events = query.all()
-        events_data = [event.to_dict() for event in events]
+        # Same query as the dashboard
+        events_data = list_user_events(current_user.id, search, tag_filter, sort_by, sort_order)
         
         return jsonify({'success': True, 'events': events_data})
         
@@ -363,37 +368,32 @@ def api_get_events():
 @login_required
 def api_get_event(event_id):
     """API endpoint to get a specific event"""
-    try:
-        event = Event.query.filter_by(id=event_id, user_id=current_user.id).first()
-        
-        if not event:
-            return jsonify({'success': False, 'error': 'Event not found'}), 404
-        
-        return jsonify({'success': True, 'event': event.to_dict()})
-        
-    except Exception as e:
-        logger.error(f"Error fetching event: {e}")
-        return jsonify({'success': False, 'error': 'Failed to fetch event'}), 500
+    event = _get_user_event(event_id)
+    
+    if not event:
+        return _not_found_response()
+    
+    return jsonify({'success': True, 'event': event.to_dict()})
 
 
 @app.route('/about')
 def about():
     """About page"""
-    return render_template('about.html')
+    return _render_page('about.html')
 
 
 # Error handlers
 @app.errorhandler(404)
 def not_found_error(error):
-    return render_template('404.html'), 404
+    return _render_page('404.html'), 404
 
 
 @app.errorhandler(500)
 def internal_error(error):
     db.session.rollback()
-    return render_template('500.html'), 500
+    return _render_page('500.html'), 500
 
 
 @app.errorhandler(403)
 def forbidden_error(error):
-    return render_template('403.html'), 403
\ No newline at end of file
+    return _render_page('403.html'), 403
\ No newline at end of file
@@ -1,105 +1,149 @@
-from typing import List
+import json
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple
 from datetime import datetime
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import lambda_stmt, select
+from app import db
 from models import Event
 
-def search_events(events: List[Event], search_term: str) -> List[Event]:
-    """Search events by name, location, or description"""
-    if not search_term:
-        return events
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ciso8601
+except ImportError:
+    ciso8601 = None
+
+def dumps_json(data: Any) -> bytes:
+    """Serialize data to UTF-8 encoded JSON, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes with orjson (requires orjson)"""
     
-    search_term = search_term.lower().strip()
-    filtered_events = []
+    def _dumps_bytes(self, obj: Any) -> bytes:
+        option = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option)
     
-    for event in events:
-        # Search in name, location, description, and tags
-        searchable_text = ' '.join([
-            event.name.lower(),
-            event.location.lower(),
-            event.description.lower(),
-            ' '.join(event.tags).lower()
-        ])
-        
-        if search_term in searchable_text:
-            filtered_events.append(event)
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return self._dumps_bytes(obj).decode('utf-8')
     
-    return filtered_events
-
-def filter_events(events: List[Event], tag_filter: str) -> List[Event]:
-    """Filter events by tag"""
-    if not tag_filter:
-        return events
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
     
-    tag_filter = tag_filter.lower().strip()
-    return [event for event in events if tag_filter in [tag.lower() for tag in event.tags]]
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dumps_bytes(obj), mimetype=self.mimetype)
 
-def sort_events(events: List[Event], sort_by: str = 'date', sort_order: str = 'asc') -> List[Event]:
-    """Sort events by specified field and order"""
-    reverse = sort_order.lower() == 'desc'
+# Columns the event listings can be ordered by; anything else sorts by date
+SORT_COLUMNS = {
+    'name': Event.name,
+    'location': Event.location,
+    'date': Event.date,
+}
+
+# Columns read by Event.row_to_dict
+EVENT_COLUMNS = (
+    Event.id, Event.name, Event.date, Event.location, Event.description,
+    Event.tags, Event.created_at, Event.updated_at, Event.user_id,
+)
+
+def list_user_events(user_id: int, search: str = '', tag_filter: str = '',
+                     sort_by: str = 'date', sort_order: str = 'asc') -> List[dict]:
+    """Query a user's events with optional search, tag filter and sorting
     
-    try:
-        if sort_by == 'name':
-            return sorted(events, key=lambda x: x.name.lower(), reverse=reverse)
-        elif sort_by == 'location':
-            return sorted(events, key=lambda x: x.location.lower(), reverse=reverse)
-        elif sort_by == 'created_at':
-            return sorted(events, key=lambda x: x.created_at, reverse=reverse)
-        elif sort_by == 'updated_at':
-            return sorted(events, key=lambda x: x.updated_at, reverse=reverse)
-        else:  # default to date
-            return sorted(events, key=lambda x: parse_date_for_sorting(x.date), reverse=reverse)
-    except Exception:
-        # Fallback to name sorting if there's an error
-        return sorted(events, key=lambda x: x.name.lower(), reverse=reverse)
+    Plain column rows are selected and turned straight into event dicts,
+    skipping ORM instance construction for what are read-only listings.
+    The statement is a lambda_stmt, so each query shape is built and
+    compiled once and later calls only bind new parameters.
+    """
+    stmt = lambda_stmt(lambda: select(*EVENT_COLUMNS).where(Event.user_id == user_id))
+    
+    if search:
+        pattern = f'%{search}%'
+        stmt += lambda s: s.where(Event.searchable_text.ilike(pattern))
+    
+    if tag_filter:
+        # Match whole tags only: 'workshop' must not match 'not-a-workshop'.
+        # Escaped here, since lambda closure values may only be bound as-is
+        tag = tag_filter.lower().replace('/', '//').replace('%', '/%').replace('_', '/_')
+        tag_pattern = f'%,{tag},%'
+        stmt += lambda s: s.where(Event.tag_list.like(tag_pattern, escape='/'))
+    
+    # Built outside the lambda so the chosen ordering is part of the cache key
+    column = SORT_COLUMNS.get(sort_by, Event.date)
+    ordering = column.desc() if sort_order == 'desc' else column.asc()
+    stmt += lambda s: s.order_by(ordering)
+    
+    return [Event.row_to_dict(row) for row in db.session.execute(stmt)]
 
-def parse_date_for_sorting(date_str: str) -> datetime:
-    """Parse date string for sorting, with fallback for invalid dates"""
+@lru_cache(maxsize=8192)
+def _parse_any(date_str: str) -> Tuple[Optional[datetime], bool]:
+    """Parse a date or datetime string once, returning (datetime or None, has time part)"""
     try:
-        # Handle various date formats
-        if 'T' in date_str:
-            return datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+        # ciso8601 handles both date-only and full ISO 8601 strings in C
+        if ciso8601 is not None:
+            dt = ciso8601.parse_datetime(date_str)
         else:
-            return datetime.strptime(date_str, '%Y-%m-%d')
+            dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
     except ValueError:
-        # Return a default date for invalid formats (far in future for desc, past for asc)
-        return datetime.min
+        return None, False
+    # Anything that parsed and is longer than 'YYYY-MM-DD' carries a time,
+    # whichever separator ('T' or ' ') it uses
+    return dt, len(date_str) > 10
+
+def parse_date_for_sorting(date_str: str) -> datetime:
+    """Parse date string for sorting, with fallback for invalid dates"""
+    dt, _ = _parse_any(date_str)
+    # Invalid formats sort before every valid date
+    return dt if dt is not None else datetime.min
 
+@lru_cache(maxsize=8192)
 def format_date_display(date_str: str) -> str:
     """Format date string for display"""
-    try:
-        if 'T' in date_str:
-            dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-            return dt.strftime('%B %d, %Y at %I:%M %p')
-        else:
-            dt = datetime.strptime(date_str, '%Y-%m-%d')
-            return dt.strftime('%B %d, %Y')
-    except ValueError:
+    dt, has_time = _parse_any(date_str)
+    if dt is None:
         return date_str  # Return original if parsing fails
+    
+    if has_time:
+        return dt.strftime('%B %d, %Y at %I:%M %p')
+    return dt.strftime('%B %d, %Y')
+
+# Field -> (required, max length, length error) for validate_event_data
+EVENT_FIELD_RULES = {
+    'name': (True, 100, "Event name must be less than 100 characters"),
+    'date': (True, None, None),
+    'location': (True, 200, "Location must be less than 200 characters"),
+    'description': (False, 1000, "Description must be less than 1000 characters"),
+}
 
 def validate_event_data(data: dict) -> List[str]:
     """Validate event data and return list of errors"""
-    errors = []
+    required_errors = []
+    length_errors = []
     
-    # Required fields
-    required_fields = ['name', 'date', 'location']
-    for field in required_fields:
-        if not data.get(field, '').strip():
-            errors.append(f"{field.title()} is required")
+    # Required fields and length limits, one lookup per field
+    for field, (required, max_length, length_error) in EVENT_FIELD_RULES.items():
+        value = data.get(field) or ''
+        if required and not value.strip():
+            required_errors.append(f"{field.title()} is required")
+        if max_length is not None and len(value) > max_length:
+            length_errors.append(length_error)
     
     # Date validation
-    if data.get('date'):
+    date_errors = []
+    date = data.get('date')
+    if date:
         try:
-            datetime.fromisoformat(data['date'].replace('Z', '+00:00'))
+            datetime.fromisoformat(date.replace('Z', '+00:00'))
         except ValueError:
-            errors.append("Invalid date format")
-    
-    # Length validations
-    if len(data.get('name', '')) > 100:
-        errors.append("Event name must be less than 100 characters")
-    
-    if len(data.get('location', '')) > 200:
-        errors.append("Location must be less than 200 characters")
-    
-    if len(data.get('description', '')) > 1000:
-        errors.append("Description must be less than 1000 characters")
+            date_errors.append("Invalid date format")
     
-    return errors
+    return required_errors + date_errors + length_errors